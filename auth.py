@@ -82,3 +82,25 @@ def get_current_user(
         raise credentials_exception
 
     return user
+
+
+def get_current_branch_id(current_user: models.User = Depends(get_current_user)) -> int:
+    """
+    FastAPI dependency — the branch the logged-in user works at.
+    Every catalog / circulation query is filtered by this id.
+    Accounts created before branches existed fall back to the default branch.
+    """
+    return current_user.branch_id or models.DEFAULT_BRANCH_ID
+
+
+def get_current_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
+    """
+    FastAPI dependency — like get_current_user, but only for admin accounts.
+    Raises 403 for everyone else.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only an admin can do this."
+        )
+    return current_user
@@ -8,21 +8,40 @@ Changes from original:
   - Added routes to serve login.html and signup.html
   - Swagger UI now shows the Authorize button for JWT
 
+Startup:
+  - Schema is brought up to date by migrations.migrate() instead of
+    create_all — a current database costs one PRAGMA read, no reflection.
+    Pending migrations run before the app serves anything; run
+    `python migrations.py` ahead of a deploy to keep them out of boot
+  - Cold start (imports + migrations + app setup) is timed and logged;
+    a warning is logged when it goes over STARTUP_TARGET_SECONDS
+
 PASTE LOCATION: library_system/main.py  (replace the whole file)
 """
 
+import logging
+import time
+
+_boot_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.openapi.utils import get_openapi
 
-from database import engine, Base
-import models   # ensures all models registered before create_all
-from routers import books, members, transactions
+from database import engine
+from migrations import migrate
+from routers import books, members, transactions, circulation, branches
 from routers import auth as auth_router
+from ratelimit import RateLimitMiddleware
+
+logger = logging.getLogger(__name__)
 
-# Create all tables (including the new `users` table)
-Base.metadata.create_all(bind=engine)
+# Cold-start budget for a new instance (imports + migrations + app setup)
+STARTUP_TARGET_SECONDS = 2.0
+
+# Create or upgrade the schema; a no-op when already at the latest version
+migrate(engine)
 
 app = FastAPI(
     title="Library Management System",
@@ -39,10 +58,17 @@ app = FastAPI(
 - **Books** — CRUD operations on the catalog
 - **Members** — register and list library members
 - **Transactions** — issue and return books
+- **Circulation** — issue or return a copy by scanning its barcode
+- **Branches** — create branches, transfer copies, consolidated catalog
+
+Books, members and transactions are scoped to the branch of the logged-in account.
     """,
     version="2.0.0"
 )
 
+# Per-user / per-IP rate limits and in-flight request cap (429 + Retry-After)
+app.add_middleware(RateLimitMiddleware)
+
 # Static files (CSS, JS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -51,6 +77,15 @@ app.include_router(auth_router.router)    # /auth/signup, /auth/login, /auth/me
 app.include_router(books.router)          # /books/
 app.include_router(members.router)        # /members/
 app.include_router(transactions.router)   # /transactions/
+app.include_router(circulation.router)    # /circulation/scan/{barcode}
+app.include_router(branches.router)       # /branches/
+
+startup_seconds = time.perf_counter() - _boot_started
+if startup_seconds > STARTUP_TARGET_SECONDS:
+    logger.warning("Cold start took %.2fs (target %.2fs)",
+                   startup_seconds, STARTUP_TARGET_SECONDS)
+else:
+    logger.info("Cold start took %.2fs", startup_seconds)
 
 
 # ── Page routes ──────────────────────────
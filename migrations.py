@@ -0,0 +1,344 @@
+"""
+migrations.py
+-------------
+VERSIONED SCHEMA MIGRATIONS (replaces Base.metadata.create_all on boot)
+
+The schema version lives in SQLite's built-in `PRAGMA user_version`, so the
+boot-time check is a single pragma read:
+
+  - version == LATEST_VERSION  → nothing else runs, no table reflection
+  - empty database             → create_all() once and stamp LATEST_VERSION
+  - older database             → run each pending migration in order
+
+Each migration is written so it can be re-run safely (IF NOT EXISTS, column
+checks, backfills that only pick untouched rows). If one is interrupted the
+version is not bumped and the next boot simply carries on.
+
+main.py calls migrate() while it is being imported, so a boot that has
+migrations to run does not serve any request until they have finished.
+For a large database, run them by hand before starting the new code:
+
+    python migrations.py
+
+The old process can keep serving meanwhile: migrations only add tables,
+columns and indexes it ignores. Data backfills go through _batched(), which
+commits every BATCH_SIZE rows so the SQLite write lock is never held for
+long, and an interrupted backfill resumes where it stopped.
+"""
+
+import logging
+from typing import Callable, List, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+from database import engine, Base
+import models
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+# ── Helpers ──────────────────────────────
+
+def get_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def set_version(conn: Connection, version: int) -> None:
+    # PRAGMA does not accept bound parameters
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def _has_table(conn: Connection, table: str) -> bool:
+    return conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).first() is not None
+
+
+def _columns(conn: Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")]
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column is already there."""
+    if column not in _columns(conn, table):
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _batched(db_engine: Engine, select_sql: str, apply: Callable[[Connection, list], None]) -> None:
+    """
+    Batched backfill. `select_sql` must take (last_id, limit) parameters and
+    return rows whose first column is an ascending id; `apply` handles one
+    batch. Each batch runs in its own short transaction.
+    """
+    last_id = 0
+    while True:
+        with db_engine.begin() as conn:
+            rows = conn.exec_driver_sql(select_sql, (last_id, BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            apply(conn, rows)
+        last_id = rows[-1][0]
+
+
+# ── Migrations ───────────────────────────
+
+def _v1_copies(db_engine: Engine) -> None:
+    """Per-copy barcode tracking: copies table, transactions.copy_id."""
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS copies (
+                id INTEGER NOT NULL PRIMARY KEY,
+                book_id INTEGER NOT NULL REFERENCES books (id),
+                barcode VARCHAR(64) NOT NULL,
+                status VARCHAR(16) NOT NULL
+            )""")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_copies_id ON copies (id)")
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_copies_barcode ON copies (barcode)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_copies_book_status ON copies (book_id, status)")
+        _add_column(conn, "transactions", "copy_id", "INTEGER REFERENCES copies (id)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_copy_id ON transactions (copy_id)")
+
+        # Databases first booted by the branch-aware build before migrations
+        # existed got copies from create_all, with branch_id NOT NULL and no
+        # default, and books.branch_id from an ALTER. Fill it in for them.
+        with_branch = "branch_id" in _columns(conn, "copies")
+        book_branch = (
+            "branch_id" if "branch_id" in _columns(conn, "books")
+            else str(models.DEFAULT_BRANCH_ID)
+        )
+
+    def insert_copy(conn: Connection, book_id: int, branch_id: int, seq: int, status: str) -> int:
+        barcode = models.copy_barcode(book_id, seq)
+        if with_branch:
+            return conn.exec_driver_sql(
+                "INSERT INTO copies (branch_id, book_id, barcode, status) VALUES (?, ?, ?, ?)",
+                (branch_id, book_id, barcode, status)
+            ).lastrowid
+        return conn.exec_driver_sql(
+            "INSERT INTO copies (book_id, barcode, status) VALUES (?, ?, ?)",
+            (book_id, barcode, status)
+        ).lastrowid
+
+    # Give every existing book its copies: one issued copy per open loan
+    # (linked to that loan) plus `quantity` copies on the shelf.
+    def create_copies(conn: Connection, books: list) -> None:
+        for book_id, quantity, branch_id in books:
+            seq = 0
+            open_loans = conn.exec_driver_sql(
+                "SELECT id FROM transactions "
+                "WHERE book_id = ? AND return_date IS NULL AND copy_id IS NULL",
+                (book_id,)
+            ).fetchall()
+            for (transaction_id,) in open_loans:
+                seq += 1
+                copy_id = insert_copy(conn, book_id, branch_id, seq, models.COPY_ISSUED)
+                conn.exec_driver_sql(
+                    "UPDATE transactions SET copy_id = ? WHERE id = ?",
+                    (copy_id, transaction_id)
+                )
+            for _ in range(max(quantity, 0)):
+                seq += 1
+                insert_copy(conn, book_id, branch_id, seq, models.COPY_AVAILABLE)
+
+    _batched(
+        db_engine,
+        f"SELECT id, quantity, {book_branch} FROM books WHERE id > ? "
+        "AND NOT EXISTS (SELECT 1 FROM copies WHERE copies.book_id = books.id) "
+        "ORDER BY id LIMIT ?",
+        create_copies
+    )
+
+
+def _v2_branches(db_engine: Engine) -> None:
+    """Branch partitioning: branches table, branch_id on every table."""
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS branches (
+                id INTEGER NOT NULL PRIMARY KEY,
+                name VARCHAR(255) NOT NULL UNIQUE
+            )""")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_branches_id ON branches (id)")
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO branches (id, name) VALUES (?, ?)",
+            (models.DEFAULT_BRANCH_ID, "Main Branch")
+        )
+
+        # A constant DEFAULT makes SQLite's ADD COLUMN a metadata-only change,
+        # so existing rows land in the main branch without rewriting the table.
+        default = f"INTEGER NOT NULL DEFAULT {models.DEFAULT_BRANCH_ID}"
+        for table in ("books", "copies", "members", "transactions"):
+            _add_column(conn, table, "branch_id", default)
+        _add_column(conn, "users", "branch_id", "INTEGER")
+
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_books_branch_title ON books (branch_id, title)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_copies_branch_id ON copies (branch_id)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_members_branch_name ON members (branch_id, name)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_branch_open "
+            "ON transactions (branch_id, return_date)")
+
+    def assign_main_branch(conn: Connection, users: list) -> None:
+        conn.exec_driver_sql(
+            f"UPDATE users SET branch_id = ? WHERE id IN ({', '.join('?' * len(users))})",
+            (models.DEFAULT_BRANCH_ID, *[user_id for (user_id,) in users])
+        )
+
+    _batched(
+        db_engine,
+        "SELECT id FROM users WHERE id > ? AND branch_id IS NULL ORDER BY id LIMIT ?",
+        assign_main_branch
+    )
+
+
+def _v3_member_search(db_engine: Engine) -> None:
+    """Member search: NOCASE name index, name tokens, loan history index."""
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS member_name_tokens (
+                id INTEGER NOT NULL PRIMARY KEY,
+                branch_id INTEGER NOT NULL REFERENCES branches (id),
+                member_id INTEGER NOT NULL REFERENCES members (id),
+                token VARCHAR(255) NOT NULL
+            )""")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_member_name_tokens_id ON member_name_tokens (id)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_member_name_tokens_member_id "
+            "ON member_name_tokens (member_id)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_member_name_tokens_branch_token "
+            "ON member_name_tokens (branch_id, token COLLATE NOCASE)")
+
+        # The plain (branch_id, name) index can't serve case-insensitive LIKE
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ix_members_branch_name")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_members_branch_name_nocase "
+            "ON members (branch_id, name COLLATE NOCASE)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_member_issue "
+            "ON transactions (member_id, issue_date)")
+
+    def tokenize(conn: Connection, members: list) -> None:
+        for member_id, branch_id, name in members:
+            for token in models.name_tokens(name):
+                conn.exec_driver_sql(
+                    "INSERT INTO member_name_tokens (branch_id, member_id, token) "
+                    "VALUES (?, ?, ?)",
+                    (branch_id, member_id, token)
+                )
+
+    _batched(
+        db_engine,
+        "SELECT id, branch_id, name FROM members WHERE id > ? "
+        "AND NOT EXISTS (SELECT 1 FROM member_name_tokens t WHERE t.member_id = members.id) "
+        "ORDER BY id LIMIT ?",
+        tokenize
+    )
+
+
+def _v4_admin_accounts(db_engine: Engine) -> None:
+    """users.is_admin; the oldest account becomes the admin."""
+    with db_engine.begin() as conn:
+        _add_column(conn, "users", "is_admin", "BOOLEAN NOT NULL DEFAULT 0")
+        conn.exec_driver_sql(
+            "UPDATE users SET is_admin = 1 "
+            "WHERE id = (SELECT MIN(id) FROM users) "
+            "AND NOT EXISTS (SELECT 1 FROM users WHERE is_admin = 1)"
+        )
+
+
+def _v5_catalog_index(db_engine: Engine) -> None:
+    """(title, author) index for the paginated cross-branch catalog."""
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_books_title_author ON books (title, author)")
+
+
+def _v6_reversed_name_tokens(db_engine: Engine) -> None:
+    """Name tokens stored backwards, so fuzzy search survives early typos."""
+    with db_engine.begin() as conn:
+        _add_column(conn, "member_name_tokens", "reversed_token", "VARCHAR(255)")
+
+    def reverse(conn: Connection, tokens: list) -> None:
+        conn.exec_driver_sql(
+            "UPDATE member_name_tokens SET reversed_token = ? WHERE id = ?",
+            [(token[::-1], token_id) for token_id, token in tokens]
+        )
+
+    _batched(
+        db_engine,
+        "SELECT id, token FROM member_name_tokens WHERE id > ? "
+        "AND reversed_token IS NULL ORDER BY id LIMIT ?",
+        reverse
+    )
+
+    # Built once the backfill is done rather than updated row by row
+    with db_engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_member_name_tokens_branch_reversed "
+            "ON member_name_tokens (branch_id, reversed_token COLLATE NOCASE)")
+
+
+# (version, description, migration) — append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[Engine], None]]] = [
+    (1, "copies table and transactions.copy_id", _v1_copies),
+    (2, "branches and branch_id partitioning", _v2_branches),
+    (3, "member name search and loan history indexes", _v3_member_search),
+    (4, "admin accounts", _v4_admin_accounts),
+    (5, "catalog title/author index", _v5_catalog_index),
+    (6, "reversed member name tokens", _v6_reversed_name_tokens),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(db_engine: Engine = engine) -> int:
+    """
+    Bring the database up to LATEST_VERSION. Returns the version it started at.
+    """
+    with db_engine.connect() as conn:
+        version = get_version(conn)
+        if version == LATEST_VERSION:
+            return version
+        fresh = version == 0 and not _has_table(conn, "books")
+
+    if fresh:
+        Base.metadata.create_all(bind=db_engine)
+        with db_engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT OR IGNORE INTO branches (id, name) VALUES (?, ?)",
+                (models.DEFAULT_BRANCH_ID, "Main Branch")
+            )
+            set_version(conn, LATEST_VERSION)
+        logger.info("Created new database at schema version %d", LATEST_VERSION)
+        return version
+
+    if version > LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this code "
+            f"({LATEST_VERSION}). Deploy the newer code or restore a backup."
+        )
+
+    for target, description, migration in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info("Migrating database to version %d: %s", target, description)
+        migration(db_engine)
+        with db_engine.begin() as conn:
+            set_version(conn, target)
+
+    return version
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = migrate()
+    print(f"Schema version {start} → {LATEST_VERSION}")
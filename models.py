@@ -4,18 +4,37 @@ models.py
 DATABASE TABLES (SQLAlchemy ORM)
 
 Tables defined here:
+  - Branch       ← each library branch; every other table is scoped to one
   - User         ← NEW: stores librarian accounts
   - Book
   - Member
+  - MemberNameToken ← one row per word of a member's name, for search
+  - Copy         ← one row per physical copy, looked up by barcode
   - Transaction
 
 PASTE LOCATION: library_system/models.py  (replace the whole file)
 """
 
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
+import re
+
+
+# Branch that accounts and data created before branches existed belong to
+DEFAULT_BRANCH_ID = 1
+
+
+class Branch(Base):
+    """
+    A library branch. Catalog and circulation data are partitioned by
+    branch_id, and each request works on the logged-in user's branch only.
+    """
+    __tablename__ = "branches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), unique=True, nullable=False)
 
 
 # ─────────────────────────────────────────
@@ -25,6 +44,9 @@ class User(Base):
     """
     Librarian / admin account.
     Passwords are stored as bcrypt hashes — never plain text.
+    branch_id decides which branch's data the account works on.
+    Admins create branches and assign accounts to them; the first account
+    ever created is an admin.
     """
     __tablename__ = "users"
 
@@ -33,18 +55,65 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False, nullable=False)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
 
 
 class Book(Base):
-    """Represents a book in the library catalog."""
+    """
+    Represents a book (title) in the library catalog.
+    `quantity` is the number of copies currently on the shelf — it is kept
+    in step with the copies table so the catalog can be listed without a join.
+    """
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_branch_title", "branch_id", "title"),
+        # consolidated catalog: GROUP BY title, author across branches
+        Index("ix_books_title_author", "title", "author"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False,
+                       default=DEFAULT_BRANCH_ID)
     title = Column(String(255), nullable=False)
     author = Column(String(255), nullable=False)
     quantity = Column(Integer, default=1, nullable=False)
 
     transactions = relationship("Transaction", back_populates="book")
+    copies = relationship("Copy", back_populates="book",
+                          cascade="all, delete-orphan")
+
+
+# Copy.status values
+COPY_AVAILABLE = "available"
+COPY_ISSUED = "issued"
+
+
+def copy_barcode(book_id: int, seq: int) -> str:
+    """Generated barcode label for the seq-th copy of a book, e.g. 000042-0003."""
+    return f"{book_id:06d}-{seq:04d}"
+
+
+class Copy(Base):
+    """
+    A single physical copy of a book, identified by its barcode label.
+    The unique index on barcode makes a desk scan a single index lookup.
+    """
+    __tablename__ = "copies"
+    __table_args__ = (
+        # "find me an available copy of book X" on issue
+        Index("ix_copies_book_status", "book_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False,
+                       default=DEFAULT_BRANCH_ID, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    barcode = Column(String(64), unique=True, nullable=False, index=True)
+    status = Column(String(16), default=COPY_AVAILABLE, nullable=False)
+
+    book = relationship("Book", back_populates="copies")
+    transactions = relationship("Transaction", back_populates="copy")
 
 
 class Member(Base):
@@ -52,20 +121,73 @@ class Member(Base):
     __tablename__ = "members"
 
     id = Column(Integer, primary_key=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False,
+                       default=DEFAULT_BRANCH_ID)
     name = Column(String(255), nullable=False)
 
+    __table_args__ = (
+        # NOCASE so `name LIKE 'pre%'` (case-insensitive) is an index range scan
+        Index("ix_members_branch_name_nocase", "branch_id", name.collate("NOCASE")),
+    )
+
     transactions = relationship("Transaction", back_populates="member")
+    name_tokens = relationship("MemberNameToken", back_populates="member",
+                               cascade="all, delete-orphan")
+
+
+def name_tokens(name: str) -> list:
+    """Lower-cased words of a member name, e.g. "Jane O'Neil" → jane, o, neil."""
+    return sorted(set(re.findall(r"\w+", name.lower())))
+
+
+def _reversed_token(context) -> str:
+    return context.get_current_parameters()["token"][::-1]
+
+
+class MemberNameToken(Base):
+    """
+    One word of a member's name. Lets search match any word of the name
+    ("doe" finds "Jane Doe") through an index instead of scanning members.
+    The word is also stored backwards, so a typo in its first letters can
+    still be looked up by how it ends.
+    """
+    __tablename__ = "member_name_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False,
+                       default=DEFAULT_BRANCH_ID)
+    member_id = Column(Integer, ForeignKey("members.id"), nullable=False, index=True)
+    token = Column(String(255), nullable=False)
+    reversed_token = Column(String(255), default=_reversed_token)
+
+    __table_args__ = (
+        Index("ix_member_name_tokens_branch_token", "branch_id", token.collate("NOCASE")),
+        Index("ix_member_name_tokens_branch_reversed", "branch_id",
+              reversed_token.collate("NOCASE")),
+    )
+
+    member = relationship("Member", back_populates="name_tokens")
 
 
 class Transaction(Base):
     """Tracks book issue and return events."""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # open loans of a branch: WHERE branch_id = ? AND return_date IS NULL
+        Index("ix_transactions_branch_open", "branch_id", "return_date"),
+        # a member's loan history, newest first
+        Index("ix_transactions_member_issue", "member_id", "issue_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False,
+                       default=DEFAULT_BRANCH_ID)
     book_id = Column(Integer, ForeignKey("books.id"),    nullable=False)
     member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
+    copy_id = Column(Integer, ForeignKey("copies.id"), nullable=True, index=True)
     issue_date = Column(Date, default=datetime.date.today, nullable=False)
     return_date = Column(Date, nullable=True)
 
     book = relationship("Book",   back_populates="transactions")
     member = relationship("Member", back_populates="transactions")
+    copy = relationship("Copy",   back_populates="transactions")
@@ -0,0 +1,179 @@
+"""
+ratelimit.py
+------------
+RATE LIMITING & ADMISSION CONTROL MIDDLEWARE
+
+Two checks run before a request reaches a router:
+
+  1. Concurrency limit — if MAX_IN_FLIGHT requests are already being served,
+     the new one is rejected at once with 429 + Retry-After instead of
+     queueing behind them in the threadpool / SQLite write lock.
+  2. Token buckets — every request is charged to the client IP's bucket and,
+     when it carries a valid JWT, to that user's bucket as well; it is
+     rejected if either is empty. So extra accounts from one IP don't add
+     budget. Each route class has its own buckets, and expensive routes
+     (login, list, bulk) get smaller budgets. An IP may be a whole branch
+     behind one NAT, so IP buckets use the larger IP_BUDGETS.
+
+State is in-process, so with several workers each one enforces its own limits.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from auth import decode_token
+
+# ── Config ───────────────────────────────
+MAX_IN_FLIGHT = 32            # concurrent requests before shedding load
+SHED_RETRY_AFTER = 1          # seconds, sent with concurrency 429s
+
+# Route class → (bucket capacity, refill tokens per second), per user
+BUDGETS: Dict[str, Tuple[float, float]] = {
+    "default": (120, 4.0),
+    "login":   (5, 5 / 60),   # 5 attempts, then one every 12 s
+    "list":    (30, 1.0),
+    "bulk":    (5, 0.1),
+}
+
+# Same, per client IP — room for a branch's staff sharing one address
+IP_BUDGETS: Dict[str, Tuple[float, float]] = {
+    "default": (1200, 40.0),
+    "login":   (20, 20 / 60),  # 20 attempts, then one every 3 s
+    "list":    (300, 10.0),
+    "bulk":    (30, 1.0),
+}
+
+# (method, path) → route class; anything else is "default"
+ROUTE_CLASSES: Dict[Tuple[str, str], str] = {
+    ("POST", "/auth/login"):       "login",
+    ("POST", "/auth/signup"):      "login",
+    ("GET",  "/books/"):           "list",
+    ("GET",  "/members/"):         "list",
+    ("GET",  "/transactions/"):    "list",
+    ("GET",  "/branches/catalog"): "bulk",
+}
+
+# Never limited: static assets and the HTML pages
+EXEMPT_PREFIXES = ("/static",)
+EXEMPT_PATHS = {"/", "/login", "/signup"}
+
+# Past this many keys the least recently used bucket is dropped
+MAX_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` burst, refilled at `rate` tokens/second."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> Optional[int]:
+        """
+        None if a token is available, otherwise the number of seconds until
+        one will be (for Retry-After). Does not spend anything.
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return None
+        return max(1, math.ceil((1 - self.tokens) / self.rate))
+
+    def take(self) -> None:
+        """Spend one token — call only after wait_time() returned None."""
+        self.tokens -= 1
+
+
+def route_class(method: str, path: str) -> str:
+    """Map a request to its budget name."""
+    return ROUTE_CLASSES.get((method, path), "default")
+
+
+def client_keys(request: Request) -> List[str]:
+    """The client IP, plus the username from a valid Bearer token if any."""
+    host = request.client.host if request.client else "unknown"
+    keys = [f"ip:{host}"]
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        username = decode_token(header[7:])
+        if username:
+            keys.append(f"user:{username}")
+    return keys
+
+
+def too_many_requests(detail: str, retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": detail},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Admission control for the whole app — register with
+    app.add_middleware(RateLimitMiddleware).
+    """
+
+    def __init__(self, app, max_in_flight: int = MAX_IN_FLIGHT):
+        super().__init__(app)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        # LRU order: least recently seen client first
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def _bucket(self, name: str, key: str) -> TokenBucket:
+        """
+        The bucket for (route class, client key). O(1): a hit moves it to the
+        end, a miss past MAX_BUCKETS evicts the least recently used one.
+        """
+        bucket = self.buckets.get((name, key))
+        if bucket is not None:
+            self.buckets.move_to_end((name, key))
+            return bucket
+
+        budgets = IP_BUDGETS if key.startswith("ip:") else BUDGETS
+        bucket = TokenBucket(*budgets[name])
+        self.buckets[(name, key)] = bucket
+        if len(self.buckets) > MAX_BUCKETS:
+            self.buckets.popitem(last=False)
+        return bucket
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+            return await call_next(request)
+
+        # Runs on the event loop thread, so the counter needs no lock
+        if self.in_flight >= self.max_in_flight:
+            return too_many_requests(
+                "Server is busy. Please retry shortly.", SHED_RETRY_AFTER)
+
+        # Only spend tokens once every bucket involved has one to give
+        name = route_class(request.method, path)
+        buckets = [self._bucket(name, key) for key in client_keys(request)]
+        waits = [w for w in (b.wait_time() for b in buckets) if w is not None]
+        if waits:
+            return too_many_requests(
+                "Too many requests. Please slow down.", max(waits))
+        for bucket in buckets:
+            bucket.take()
+
+        self.in_flight += 1
+        try:
+            return await call_next(request)
+        finally:
+            self.in_flight -= 1
@@ -28,6 +28,8 @@ def signup(payload: schemas.UserSignup, db: Session = Depends(get_db)):
     Register a new librarian account.
 
     - Checks username and email are not already taken
+    - New accounts work at the main branch; an admin moves them with
+      PUT /branches/{id}/users. The very first account becomes the admin.
     - Hashes the password with bcrypt
     - Returns a JWT so the user is immediately logged in
     """
@@ -49,7 +51,9 @@ def signup(payload: schemas.UserSignup, db: Session = Depends(get_db)):
     user = models.User(
         username=payload.username,
         email=payload.email,
-        hashed_password=hash_password(payload.password)
+        hashed_password=hash_password(payload.password),
+        branch_id=models.DEFAULT_BRANCH_ID,
+        is_admin=db.query(models.User.id).first() is None
     )
     db.add(user)
     db.commit()
@@ -6,29 +6,79 @@ BOOK CRUD ENDPOINTS
 PASTE LOCATION: library_system/routers/books.py  (replace the whole file)
 
 Fix: delete endpoint now checks for active transactions before allowing deletion.
+
+Each book owns one row per physical copy (models.Copy). Creating a book with
+quantity N creates N copies with generated barcodes; more can be added with
+POST /books/{id}/copies.
+
+All routes only see books of the logged-in user's branch.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
-from auth import get_current_user
+from auth import get_current_branch_id
 import models
 import schemas
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
 
+def add_copies(db: Session, book: models.Book, count: int) -> List[models.Copy]:
+    """
+    Attach `count` new shelf copies to `book` (book must already have an id),
+    with generated "<book id>-<n>" barcodes numbered after the existing copies.
+    Labels already in use are skipped with one lookup per round, not per copy.
+    Does not touch book.quantity and does not commit.
+    """
+    seq = db.query(models.Copy).filter(models.Copy.book_id == book.id).count()
+    barcodes: List[str] = []
+    while len(barcodes) < count:
+        batch = [models.copy_barcode(book.id, seq + n)
+                 for n in range(1, count - len(barcodes) + 1)]
+        seq += len(batch)
+        # Skip over any label a librarian already typed in by hand
+        taken = {barcode for (barcode,) in db.query(models.Copy.barcode).filter(
+            models.Copy.barcode.in_(batch))}
+        barcodes.extend(b for b in batch if b not in taken)
+
+    copies = [
+        models.Copy(branch_id=book.branch_id, book_id=book.id, barcode=barcode,
+                    status=models.COPY_AVAILABLE)
+        for barcode in barcodes
+    ]
+    db.add_all(copies)
+    return copies
+
+
+def add_copy(db: Session, book: models.Book, barcode: Optional[str] = None) -> models.Copy:
+    """
+    Attach one shelf copy to `book`, generating its barcode when none is given.
+    Does not touch book.quantity and does not commit.
+    """
+    if barcode is None:
+        return add_copies(db, book, 1)[0]
+
+    copy = models.Copy(branch_id=book.branch_id, book_id=book.id, barcode=barcode,
+                       status=models.COPY_AVAILABLE)
+    db.add(copy)
+    return copy
+
+
 @router.post("/", response_model=schemas.BookResponse, status_code=201)
 def create_book(
     book: schemas.BookCreate,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Add a new book. Requires login."""
-    db_book = models.Book(**book.model_dump())
+    """Add a new book along with `quantity` barcoded copies. Requires login."""
+    db_book = models.Book(**book.model_dump(), branch_id=branch_id)
     db.add(db_book)
+    db.flush()   # need the id for the generated barcodes
+
+    add_copies(db, db_book, db_book.quantity)
     db.commit()
     db.refresh(db_book)
     return db_book
@@ -37,10 +87,10 @@ def create_book(
 @router.get("/", response_model=List[schemas.BookResponse])
 def get_all_books(
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Return all books. Requires login."""
-    return db.query(models.Book).all()
+    """Return all books of your branch. Requires login."""
+    return db.query(models.Book).filter(models.Book.branch_id == branch_id).all()
 
 
 @router.put("/{book_id}", response_model=schemas.BookResponse)
@@ -48,10 +98,13 @@ def update_book(
     book_id: int,
     updates: schemas.BookUpdate,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Update book details. Requires login."""
-    book = db.query(models.Book).filter(models.Book.id == book_id).first()
+    """Update a book's title / author. Requires login."""
+    book = db.query(models.Book).filter(
+        models.Book.id == book_id,
+        models.Book.branch_id == branch_id
+    ).first()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
@@ -63,11 +116,59 @@ def update_book(
     return book
 
 
+@router.get("/{book_id}/copies", response_model=List[schemas.CopyResponse])
+def get_book_copies(
+    book_id: int,
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """List the physical copies of a book and their status. Requires login."""
+    book = db.query(models.Book).filter(
+        models.Book.id == book_id,
+        models.Book.branch_id == branch_id
+    ).first()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book.copies
+
+
+@router.post("/{book_id}/copies", response_model=schemas.CopyResponse, status_code=201)
+def create_book_copy(
+    book_id: int,
+    payload: schemas.CopyCreate,
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """
+    Add one physical copy to a book. Requires login.
+    The book's available quantity goes up by one.
+    """
+    book = db.query(models.Book).filter(
+        models.Book.id == book_id,
+        models.Book.branch_id == branch_id
+    ).first()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    if payload.barcode and db.query(models.Copy.id).filter(
+            models.Copy.barcode == payload.barcode).first():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A copy with this barcode already exists."
+        )
+
+    copy = add_copy(db, book, payload.barcode)
+    book.quantity += 1
+    db.commit()
+    db.refresh(copy)
+    return copy
+
+
 @router.delete("/{book_id}", status_code=204)
 def delete_book(
     book_id: int,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
     """
     Delete a book. Requires login.
@@ -78,7 +179,10 @@ def delete_book(
     Books with only fully-returned transaction history CAN be deleted.
     Their historical transaction records are also removed to keep the DB clean.
     """
-    book = db.query(models.Book).filter(models.Book.id == book_id).first()
+    book = db.query(models.Book).filter(
+        models.Book.id == book_id,
+        models.Book.branch_id == branch_id
+    ).first()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
@@ -98,6 +202,7 @@ def delete_book(
         )
 
     # Safe to delete: remove completed transaction history first, then the book
+    # (its copies go with it via the relationship cascade)
     db.query(models.Transaction).filter(
         models.Transaction.book_id == book_id
     ).delete(synchronize_session=False)
@@ -0,0 +1,203 @@
+"""
+routers/branches.py
+-------------------
+BRANCH ENDPOINTS (protected)
+
+Routes:
+  POST /branches/            → create a branch (admin)
+  GET  /branches/            → list branches
+  PUT  /branches/{id}/users  → move an account to a branch (admin)
+  POST /branches/transfers   → move a shelf copy to another branch
+  GET  /branches/catalog     → consolidated catalog across all branches (paginated)
+
+Everything else in the API is scoped to the logged-in user's branch;
+these routes are the only ones that look across branches.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session
+from typing import List
+
+from database import get_db
+from auth import get_current_user, get_current_admin, get_current_branch_id
+from routers.members import PAGE_SIZE, MAX_PAGE_SIZE
+import models
+import schemas
+
+router = APIRouter(prefix="/branches", tags=["Branches"])
+
+
+@router.post("/", response_model=schemas.BranchResponse, status_code=201)
+def create_branch(
+    payload: schemas.BranchCreate,
+    db: Session = Depends(get_db),
+    _admin=Depends(get_current_admin)
+):
+    """Create a new branch. Admin only."""
+    if db.query(models.Branch).filter(models.Branch.name == payload.name).first():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A branch with this name already exists."
+        )
+
+    branch = models.Branch(name=payload.name)
+    db.add(branch)
+    db.commit()
+    db.refresh(branch)
+    return branch
+
+
+@router.get("/", response_model=List[schemas.BranchResponse])
+def get_all_branches(
+    db: Session = Depends(get_db),
+    _user=Depends(get_current_user)
+):
+    """Return all branches. Requires login."""
+    return db.query(models.Branch).order_by(models.Branch.id).all()
+
+
+@router.put("/{branch_id}/users", response_model=schemas.UserResponse)
+def assign_user_to_branch(
+    branch_id: int,
+    payload: schemas.BranchAssignment,
+    db: Session = Depends(get_db),
+    _admin=Depends(get_current_admin)
+):
+    """
+    Move an account to a branch. Admin only.
+    From its next request on, the account only sees that branch's data.
+    """
+    if not db.get(models.Branch, branch_id):
+        raise HTTPException(status_code=404, detail="Branch not found")
+
+    user = db.query(models.User).filter(
+        models.User.username == payload.username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.branch_id = branch_id
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@router.post("/transfers", response_model=schemas.CopyResponse)
+def transfer_copy(
+    payload: schemas.TransferRequest,
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """
+    Send a copy from your branch to another branch. Requires login.
+
+    - The copy must be on the shelf (not issued)
+    - It is attached to the destination branch's record of the same
+      title/author, which is created if that branch doesn't have one yet
+    - Available quantities of both branches are adjusted
+    """
+    copy = db.query(models.Copy).filter(
+        models.Copy.barcode == payload.barcode,
+        models.Copy.branch_id == branch_id
+    ).first()
+    if not copy:
+        raise HTTPException(status_code=404, detail="No copy with this barcode at this branch")
+
+    if payload.to_branch_id == branch_id:
+        raise HTTPException(status_code=400, detail="Copy is already at this branch")
+
+    if not db.get(models.Branch, payload.to_branch_id):
+        raise HTTPException(status_code=404, detail="Branch not found")
+
+    if copy.status != models.COPY_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Copy is issued — it must be returned before it can be transferred."
+        )
+
+    source = copy.book
+    target = db.query(models.Book).filter(
+        models.Book.branch_id == payload.to_branch_id,
+        models.Book.title == source.title,
+        models.Book.author == source.author
+    ).first()
+    if not target:
+        target = models.Book(
+            branch_id=payload.to_branch_id,
+            title=source.title,
+            author=source.author,
+            quantity=0
+        )
+        db.add(target)
+        db.flush()
+
+    # Move the copy only if it is still on the shelf here (it may have been
+    # issued since we read it)
+    moved = db.query(models.Copy).filter(
+        models.Copy.id == copy.id,
+        models.Copy.branch_id == branch_id,
+        models.Copy.status == models.COPY_AVAILABLE
+    ).update({models.Copy.book_id: target.id, models.Copy.branch_id: target.branch_id})
+    if not moved:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Copy was just issued or moved — it can't be transferred now."
+        )
+
+    source.quantity = models.Book.quantity - 1
+    target.quantity = models.Book.quantity + 1
+
+    db.commit()
+    db.refresh(copy)
+    return copy
+
+
+@router.get("/catalog", response_model=List[schemas.ConsolidatedBook])
+def get_consolidated_catalog(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    _user=Depends(get_current_user)
+):
+    """
+    Read-only view of every branch's catalog, one page of titles at a time,
+    grouped by title and author. Requires login.
+
+    The grouping is done in SQL along the (title, author) index, so only the
+    rows of the requested page are read, plus their per-branch stock.
+    """
+    groups = db.query(
+        models.Book.title,
+        models.Book.author,
+        func.sum(models.Book.quantity)
+    ).group_by(
+        models.Book.title, models.Book.author
+    ).order_by(
+        models.Book.title, models.Book.author
+    ).offset(skip).limit(limit).all()
+
+    if not groups:
+        return []
+
+    catalog = {
+        (title, author): schemas.ConsolidatedBook(
+            title=title, author=author, total_quantity=total, branches=[])
+        for title, author, total in groups
+    }
+
+    stock = db.query(models.Book, models.Branch.name).join(
+        models.Branch, models.Branch.id == models.Book.branch_id
+    ).filter(
+        tuple_(models.Book.title, models.Book.author).in_(list(catalog))
+    ).order_by(models.Book.branch_id).all()
+
+    for book, branch_name in stock:
+        catalog[(book.title, book.author)].branches.append(schemas.BranchStock(
+            branch_id=book.branch_id,
+            branch_name=branch_name,
+            book_id=book.id,
+            quantity=book.quantity
+        ))
+
+    return list(catalog.values())
@@ -0,0 +1,80 @@
+"""
+routers/circulation.py
+----------------------
+BARCODE CIRCULATION DESK (protected)
+
+Routes:
+  POST /circulation/scan/{barcode}  → issue the copy if it is on the shelf,
+                                      return it if it is out on loan
+
+The barcode is a unique index on the copies table, so each scan is a single
+index lookup — no transaction ID needs to be typed in at the desk.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+from auth import get_current_branch_id
+from routers.transactions import issue_copy, close_transaction, to_response
+import models
+import schemas
+
+router = APIRouter(prefix="/circulation", tags=["Circulation"])
+
+
+@router.post("/scan/{barcode}", response_model=schemas.ScanResponse)
+def scan_copy(
+    barcode: str,
+    payload: Optional[schemas.ScanRequest] = None,
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """
+    Issue or return a copy by its barcode. Requires login.
+
+    - Copy on the shelf   → issued to `member_id` (required in the body)
+    - Copy out on loan    → its open transaction is closed
+    """
+    copy = db.query(models.Copy).filter(
+        models.Copy.barcode == barcode,
+        models.Copy.branch_id == branch_id
+    ).first()
+    if not copy:
+        raise HTTPException(status_code=404, detail="No copy with this barcode at this branch")
+
+    if copy.status == models.COPY_ISSUED:
+        transaction = db.query(models.Transaction).filter(
+            models.Transaction.copy_id == copy.id,
+            models.Transaction.return_date == None   # noqa: E711
+        ).first()
+        if not transaction:
+            raise HTTPException(
+                status_code=409,
+                detail="Copy is marked as issued but has no open transaction."
+            )
+
+        close_transaction(db, transaction)
+        db.commit()
+        db.refresh(transaction)
+        return schemas.ScanResponse(action="returned", transaction=to_response(transaction))
+
+    member_id = payload.member_id if payload else None
+    if member_id is None:
+        raise HTTPException(
+            status_code=400,
+            detail="This copy is on the shelf — choose a member to issue it to."
+        )
+
+    member = db.query(models.Member).filter(
+        models.Member.id == member_id,
+        models.Member.branch_id == branch_id
+    ).first()
+    if not member:
+        raise HTTPException(status_code=404, detail="Member not found")
+
+    transaction = issue_copy(db, copy.book, member, copy)
+    db.commit()
+    db.refresh(transaction)
+    return schemas.ScanResponse(action="issued", transaction=to_response(transaction))
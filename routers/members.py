@@ -3,29 +3,111 @@ routers/members.py
 ------------------
 MEMBER ENDPOINTS (protected)
 
+Routes:
+  POST /members/              → register a member
+  GET  /members/              → list members (paginated)
+  GET  /members/search?q=     → desk lookup by name (prefix, or fuzzy=true)
+  GET  /members/{id}          → member with their current and past loans
+
+List endpoints take skip/limit and never return more than MAX_PAGE_SIZE rows.
+
 PASTE LOCATION: library_system/routers/members.py  (replace the whole file)
 """
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from difflib import SequenceMatcher
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 
 from database import get_db
-from auth import get_current_user
+from auth import get_current_branch_id
+from routers.transactions import to_response
 import models
 import schemas
 
 router = APIRouter(prefix="/members", tags=["Members"])
 
+# ── Config ───────────────────────────────
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+FUZZY_ANCHOR = 1           # typo candidates must share this many letters at one end
+FUZZY_CANDIDATES = 500     # max name tokens looked at per query word
+FUZZY_MIN_SCORE = 0.6
+
+
+def _like_prefix(text: str) -> str:
+    """LIKE pattern matching values that start with `text` (wildcards escaped)."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _nearest(in_branch, column, word: str, room: int) -> List[int]:
+    """
+    Up to `room` member ids whose `column` shares the first FUZZY_ANCHOR
+    letters of `word` and sorts nearest to it, half on each side.
+    """
+    ordered = column.collate("NOCASE")
+    near = in_branch.filter(column.like(_like_prefix(word[:FUZZY_ANCHOR]), escape="\\"))
+    above = near.filter(ordered > word).order_by(ordered).limit(room - room // 2).all()
+    below = near.filter(ordered < word).order_by(ordered.desc()).limit(room // 2).all()
+    return [member_id for (member_id,) in above + below]
+
+
+def _fuzzy_candidates(db: Session, branch_id: int, word: str) -> set:
+    """
+    Member ids whose name has a word close to `word`, at most FUZZY_CANDIDATES.
+
+    Words starting with `word` itself are read first, so exact and prefix
+    matches are never crowded out. Any room left is shared by the words
+    nearest to it in sort order, read forwards and backwards: a typo in the
+    first letters leaves the end intact, and one near the end leaves the
+    start. Every read is a range on a (branch_id, token) index.
+    """
+    tokens = models.MemberNameToken
+    in_branch = db.query(tokens.member_id).filter(tokens.branch_id == branch_id)
+    starts_with_word = tokens.token.like(_like_prefix(word), escape="\\")
+
+    rows = in_branch.filter(starts_with_word).order_by(
+        tokens.token.collate("NOCASE")).limit(FUZZY_CANDIDATES).all()
+    member_ids = {member_id for (member_id,) in rows}
+
+    room = FUZZY_CANDIDATES - len(rows)
+    if room > 0 and len(word) > FUZZY_ANCHOR:
+        member_ids.update(_nearest(
+            in_branch.filter(~starts_with_word), tokens.token, word, room - room // 2))
+        member_ids.update(_nearest(
+            in_branch, tokens.reversed_token, word[::-1], room // 2))
+
+    return member_ids
+
+
+def _fuzzy_score(words: List[str], name: str) -> float:
+    """Average, over the query words, of the best match against the name's words."""
+    tokens = models.name_tokens(name)
+    if not tokens:
+        return 0.0
+    total = 0.0
+    for word in words:
+        total += max(
+            1.0 if token.startswith(word) else SequenceMatcher(None, word, token).ratio()
+            for token in tokens
+        )
+    return total / len(words)
+
 
 @router.post("/", response_model=schemas.MemberResponse, status_code=201)
 def register_member(
     member: schemas.MemberCreate,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Register a new library member. Requires login."""
-    db_member = models.Member(**member.model_dump())
+    """Register a new member at your branch. Requires login."""
+    db_member = models.Member(**member.model_dump(), branch_id=branch_id)
+    db_member.name_tokens = [
+        models.MemberNameToken(branch_id=branch_id, token=token)
+        for token in models.name_tokens(db_member.name)
+    ]
     db.add(db_member)
     db.commit()
     db.refresh(db_member)
@@ -34,8 +116,102 @@ def register_member(
 
 @router.get("/", response_model=List[schemas.MemberResponse])
 def get_all_members(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Return all registered members. Requires login."""
-    return db.query(models.Member).all()
+    """Return one page of the members registered at your branch. Requires login."""
+    return db.query(models.Member).filter(
+        models.Member.branch_id == branch_id
+    ).order_by(models.Member.id).offset(skip).limit(limit).all()
+
+
+@router.get("/search", response_model=List[schemas.MemberResponse])
+def search_members(
+    q: str = Query(..., min_length=1, max_length=100),
+    fuzzy: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """
+    Find members of your branch by name, case-insensitively. Requires login.
+
+    - Default: names starting with `q`, in name order — a range scan on the
+      (branch_id, name COLLATE NOCASE) index
+    - fuzzy=true: any word of the name may match, typos allowed. Candidates
+      come from the name-token index (see _fuzzy_candidates), then are
+      ranked by similarity, best first
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=422, detail="Search text cannot be blank.")
+
+    if not fuzzy:
+        return db.query(models.Member).filter(
+            models.Member.branch_id == branch_id,
+            models.Member.name.like(_like_prefix(q), escape="\\")
+        ).order_by(models.Member.name.collate("NOCASE")).offset(skip).limit(limit).all()
+
+    words = models.name_tokens(q)[:3]
+    if not words:
+        return []
+
+    member_ids = set()
+    for word in words:
+        member_ids.update(_fuzzy_candidates(db, branch_id, word))
+
+    if not member_ids:
+        return []
+
+    candidates = db.query(models.Member).filter(
+        models.Member.id.in_(member_ids)).all()
+    scored = [(_fuzzy_score(words, m.name), m) for m in candidates]
+    scored = [(score, m) for score, m in scored if score >= FUZZY_MIN_SCORE]
+    scored.sort(key=lambda pair: (-pair[0], pair[1].name.lower()))
+
+    return [m for _, m in scored[skip:skip + limit]]
+
+
+@router.get("/{member_id}", response_model=schemas.MemberDetail)
+def get_member(
+    member_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    branch_id: int = Depends(get_current_branch_id)
+):
+    """
+    Return a member with one page of their loans — open loans first, then
+    returned ones, newest first. Requires login.
+    The page of loans (with book and copy) is fetched in a single joined query.
+    """
+    member = db.query(models.Member).filter(
+        models.Member.id == member_id,
+        models.Member.branch_id == branch_id
+    ).first()
+    if not member:
+        raise HTTPException(status_code=404, detail="Member not found")
+
+    loans = db.query(models.Transaction).options(
+        joinedload(models.Transaction.book),
+        joinedload(models.Transaction.copy)
+    ).filter(
+        models.Transaction.member_id == member.id
+    ).order_by(
+        models.Transaction.return_date.isnot(None),
+        models.Transaction.issue_date.desc(),
+        models.Transaction.id.desc()
+    ).offset(skip).limit(limit).all()
+
+    return schemas.MemberDetail(
+        id=member.id,
+        branch_id=member.branch_id,
+        name=member.name,
+        current_loans=[to_response(t) for t in loans if t.return_date is None],
+        past_loans=[to_response(t) for t in loans if t.return_date is not None],
+        skip=skip,
+        limit=limit
+    )
@@ -4,6 +4,9 @@ routers/transactions.py
 TRANSACTION ENDPOINTS (protected)
 
 PASTE LOCATION: library_system/routers/transactions.py  (replace the whole file)
+
+issue_copy() / close_transaction() hold the shared issue/return bookkeeping
+and are also used by the barcode scan endpoint in routers/circulation.py.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -12,65 +15,137 @@ from typing import List
 import datetime
 
 from database import get_db
-from auth import get_current_user
+from auth import get_current_branch_id
 import models
 import schemas
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
+def to_response(transaction: models.Transaction) -> schemas.TransactionResponse:
+    """Build the API response for a transaction, including display names."""
+    return schemas.TransactionResponse(
+        id=transaction.id,
+        book_id=transaction.book_id,
+        member_id=transaction.member_id,
+        issue_date=transaction.issue_date,
+        return_date=transaction.return_date,
+        book_title=transaction.book.title,
+        member_name=transaction.member.name,
+        barcode=transaction.copy.barcode if transaction.copy else None
+    )
+
+
+def issue_copy(
+    db: Session,
+    book: models.Book,
+    member: models.Member,
+    copy: models.Copy
+) -> models.Transaction:
+    """
+    Record a loan of `copy` (of `book`) to `member`, mark the copy as issued
+    and keep the available count in step. Does not commit.
+
+    The copy is claimed with a conditional UPDATE, so when two requests race
+    for the same copy only one of them gets it — the other gets a 409.
+    """
+    claimed = db.query(models.Copy).filter(
+        models.Copy.id == copy.id,
+        models.Copy.status == models.COPY_AVAILABLE
+    ).update({models.Copy.status: models.COPY_ISSUED})
+    if not claimed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This copy was just issued by someone else. Please try again."
+        )
+
+    # quantity = quantity - 1 in SQL, not a read-modify-write in Python
+    book.quantity = models.Book.quantity - 1
+
+    transaction = models.Transaction(
+        branch_id=book.branch_id,
+        book=book,
+        member=member,
+        copy=copy,
+        issue_date=datetime.date.today()
+    )
+    db.add(transaction)
+    return transaction
+
+
+def close_transaction(db: Session, transaction: models.Transaction) -> None:
+    """
+    Mark a loan as returned and put the copy back on the shelf. Does not commit.
+    Guarded like issue_copy(): a loan can only be closed once.
+    """
+    closed = db.query(models.Transaction).filter(
+        models.Transaction.id == transaction.id,
+        models.Transaction.return_date == None   # noqa: E711
+    ).update({models.Transaction.return_date: datetime.date.today()})
+    if not closed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This loan was just returned by someone else."
+        )
+
+    transaction.book.quantity = models.Book.quantity + 1
+    if transaction.copy_id is not None:
+        db.query(models.Copy).filter(
+            models.Copy.id == transaction.copy_id,
+            models.Copy.status == models.COPY_ISSUED
+        ).update({models.Copy.status: models.COPY_AVAILABLE})
+
+
 @router.post("/issue", response_model=schemas.TransactionResponse, status_code=201)
 def issue_book(
     payload: schemas.IssueBookRequest,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Issue a book to a member. Requires login."""
+    """
+    Issue a book to a member. Requires login.
+    Any available copy of the book is picked; scan a barcode at
+    /circulation/scan/{barcode} to issue a specific copy.
+    """
     book = db.query(models.Book).filter(
-        models.Book.id == payload.book_id).first()
+        models.Book.id == payload.book_id,
+        models.Book.branch_id == branch_id
+    ).first()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    if book.quantity <= 0:
-        raise HTTPException(
-            status_code=400, detail="No copies currently available")
-
     member = db.query(models.Member).filter(
-        models.Member.id == payload.member_id).first()
+        models.Member.id == payload.member_id,
+        models.Member.branch_id == branch_id
+    ).first()
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
 
-    book.quantity -= 1
+    copy = db.query(models.Copy).filter(
+        models.Copy.book_id == book.id,
+        models.Copy.status == models.COPY_AVAILABLE
+    ).first()
+    if not copy:
+        raise HTTPException(
+            status_code=400, detail="No copies currently available")
 
-    transaction = models.Transaction(
-        book_id=payload.book_id,
-        member_id=payload.member_id,
-        issue_date=datetime.date.today()
-    )
-    db.add(transaction)
+    transaction = issue_copy(db, book, member, copy)
     db.commit()
     db.refresh(transaction)
 
-    return schemas.TransactionResponse(
-        id=transaction.id,
-        book_id=transaction.book_id,
-        member_id=transaction.member_id,
-        issue_date=transaction.issue_date,
-        return_date=transaction.return_date,
-        book_title=book.title,
-        member_name=member.name
-    )
+    return to_response(transaction)
 
 
 @router.put("/return/{transaction_id}", response_model=schemas.TransactionResponse)
 def return_book(
     transaction_id: int,
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
     """Return a book. Requires login."""
     transaction = db.query(models.Transaction).filter(
-        models.Transaction.id == transaction_id
+        models.Transaction.id == transaction_id,
+        models.Transaction.branch_id == branch_id
     ).first()
 
     if not transaction:
@@ -79,41 +154,22 @@ def return_book(
     if transaction.return_date is not None:
         raise HTTPException(status_code=400, detail="Book already returned")
 
-    transaction.return_date = datetime.date.today()
-    transaction.book.quantity += 1
+    close_transaction(db, transaction)
     db.commit()
     db.refresh(transaction)
 
-    return schemas.TransactionResponse(
-        id=transaction.id,
-        book_id=transaction.book_id,
-        member_id=transaction.member_id,
-        issue_date=transaction.issue_date,
-        return_date=transaction.return_date,
-        book_title=transaction.book.title,
-        member_name=transaction.member.name
-    )
+    return to_response(transaction)
 
 
 @router.get("/", response_model=List[schemas.TransactionResponse])
 def get_active_transactions(
     db: Session = Depends(get_db),
-    _user=Depends(get_current_user)
+    branch_id: int = Depends(get_current_branch_id)
 ):
-    """Return all unreturned transactions. Requires login."""
+    """Return all unreturned transactions of your branch. Requires login."""
     transactions = db.query(models.Transaction).filter(
+        models.Transaction.branch_id == branch_id,
         models.Transaction.return_date == None
     ).all()
 
-    return [
-        schemas.TransactionResponse(
-            id=t.id,
-            book_id=t.book_id,
-            member_id=t.member_id,
-            issue_date=t.issue_date,
-            return_date=t.return_date,
-            book_title=t.book.title,
-            member_name=t.member.name
-        )
-        for t in transactions
-    ]
+    return [to_response(t) for t in transactions]
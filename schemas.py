@@ -7,7 +7,7 @@ PASTE LOCATION: library_system/schemas.py  (replace the whole file)
 """
 
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import List, Optional
 import datetime
 
 
@@ -59,31 +59,127 @@ class UserResponse(BaseModel):
     username: str
     email: str
     is_active: bool
+    is_admin: bool = False
+    branch_id: Optional[int] = None
 
     model_config = {"from_attributes": True}
 
 
+# ──────────────────────────────────────────
+# BRANCH SCHEMAS
+# ──────────────────────────────────────────
+
+class BranchCreate(BaseModel):
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def name_rules(cls, v):
+        v = v.strip()
+        if not v:
+            raise ValueError("Branch name cannot be empty.")
+        return v
+
+
+class BranchResponse(BaseModel):
+    id:   int
+    name: str
+
+    model_config = {"from_attributes": True}
+
+
+class BranchAssignment(BaseModel):
+    username: str
+
+
+class TransferRequest(BaseModel):
+    barcode:      str
+    to_branch_id: int
+
+
+class BranchStock(BaseModel):
+    branch_id:   int
+    branch_name: str
+    book_id:     int
+    quantity:    int
+
+
+class ConsolidatedBook(BaseModel):
+    title:          str
+    author:         str
+    total_quantity: int
+    branches:       List[BranchStock]
+
+
 # ──────────────────────────────────────────
 # BOOK SCHEMAS
 # ──────────────────────────────────────────
 
+# Most copies one POST /books/ may create — keeps the write short
+MAX_COPIES_PER_BOOK = 1000
+
+
 class BookCreate(BaseModel):
     title:    str
     author:   str
-    quantity: int = 1
+    quantity: int = 1   # number of barcoded copies to create
+
+    @field_validator("quantity")
+    @classmethod
+    def quantity_rules(cls, v):
+        if v < 0:
+            raise ValueError("Quantity cannot be negative.")
+        if v > MAX_COPIES_PER_BOOK:
+            raise ValueError(
+                f"Quantity must be {MAX_COPIES_PER_BOOK} or fewer. "
+                "Add more copies with POST /books/{id}/copies.")
+        return v
 
 
 class BookUpdate(BaseModel):
+    # quantity is derived from the copies table — add copies with
+    # POST /books/{id}/copies instead of editing it
     title:    Optional[str] = None
     author:   Optional[str] = None
-    quantity: Optional[int] = None
 
 
 class BookResponse(BaseModel):
-    id:       int
-    title:    str
-    author:   str
-    quantity: int
+    id:        int
+    branch_id: int
+    title:     str
+    author:    str
+    quantity:  int
+
+    model_config = {"from_attributes": True}
+
+
+# ──────────────────────────────────────────
+# COPY SCHEMAS
+# ──────────────────────────────────────────
+
+class CopyCreate(BaseModel):
+    # Leave empty to have a barcode generated for you
+    barcode: Optional[str] = None
+
+    @field_validator("barcode")
+    @classmethod
+    def barcode_rules(cls, v):
+        if v is None:
+            return v
+        v = v.strip()
+        if not v:
+            return None
+        if len(v) > 64:
+            raise ValueError("Barcode must be 64 characters or fewer.")
+        return v
+
+
+class CopyResponse(BaseModel):
+    id:        int
+    branch_id: int
+    book_id:   int
+    barcode:   str
+    status:    str
 
     model_config = {"from_attributes": True}
 
@@ -97,8 +193,9 @@ class MemberCreate(BaseModel):
 
 
 class MemberResponse(BaseModel):
-    id:   int
-    name: str
+    id:        int
+    branch_id: int
+    name:      str
 
     model_config = {"from_attributes": True}
 
@@ -120,5 +217,34 @@ class TransactionResponse(BaseModel):
     return_date: Optional[datetime.date] = None
     book_title:  Optional[str] = None
     member_name: Optional[str] = None
+    barcode:     Optional[str] = None
 
     model_config = {"from_attributes": True}
+
+
+# ──────────────────────────────────────────
+# CIRCULATION SCHEMAS
+# ──────────────────────────────────────────
+
+class ScanRequest(BaseModel):
+    # Only needed when the scanned copy is on the shelf (i.e. being issued)
+    member_id: Optional[int] = None
+
+
+class ScanResponse(BaseModel):
+    action:      str                   # "issued" or "returned"
+    transaction: TransactionResponse
+
+
+# ──────────────────────────────────────────
+# MEMBER ACTIVITY SCHEMAS
+# ──────────────────────────────────────────
+
+class MemberDetail(BaseModel):
+    id:            int
+    branch_id:     int
+    name:          str
+    current_loans: List[TransactionResponse]   # open loans on this page
+    past_loans:    List[TransactionResponse]   # returned loans on this page
+    skip:          int
+    limit:         int
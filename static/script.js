@@ -11,6 +11,12 @@
  *   - If any API call returns 401, user is sent to /login
  *   - logout() clears the token and redirects to /login
  *   - On load, fetches /auth/me to get the logged-in user's name for the header
+ *
+ * The member list is paginated server-side; the "Find Member" box searches
+ * by name and refills the member table and dropdowns with the matches.
+ *
+ * Returns are done by scanning a copy barcode (/circulation/scan/{barcode})
+ * instead of typing a transaction ID.
  */
 
 // ─────────────────────────────────────────────
@@ -169,11 +175,35 @@ function populateBookSelect(books) {
 
 async function loadMembers() {
   const members = await apiFetch("/members/");
+  renderMembers(members, "No members registered yet.");
+}
+
+// Desk lookup: name prefix first, fall back to fuzzy (typo-tolerant) search
+async function searchMembers(query) {
+  const q = encodeURIComponent(query);
+  let members = await apiFetch(`/members/search?q=${q}`);
+  if (members && members.length === 0) {
+    members = await apiFetch(`/members/search?q=${q}&fuzzy=true`);
+  }
+  renderMembers(members, "No matching members.");
+}
+
+let memberSearchTimer = null;
+
+function onMemberSearch(e) {
+  const query = e.target.value.trim();
+  clearTimeout(memberSearchTimer);
+  memberSearchTimer = setTimeout(() => {
+    query ? searchMembers(query) : loadMembers();
+  }, 250);
+}
+
+function renderMembers(members, emptyText) {
   const tbody = document.getElementById("members-tbody");
   tbody.innerHTML = "";
 
   if (!members || members.length === 0) {
-    tbody.innerHTML = `<tr class="empty-row"><td colspan="2">No members registered yet.</td></tr>`;
+    tbody.innerHTML = `<tr class="empty-row"><td colspan="2">${emptyText}</td></tr>`;
     return;
   }
 
@@ -256,13 +286,23 @@ async function returnBook(transactionId) {
   loadTransactions();
 }
 
-async function returnBySearch(e) {
+async function scanBarcode(e) {
   e.preventDefault();
-  const id = parseInt(document.getElementById("returnTxnId").value);
-  if (!id) { showToast("Please enter a transaction ID.", "error"); return; }
-  const res = await apiFetch(`/transactions/return/${id}`, { method: "PUT" });
-  showToast(`"${res.book_title}" returned!`);
-  e.target.reset();
+  const form = e.target;
+  const barcode = form.scanBarcode.value.trim();
+  if (!barcode) { showToast("Please scan a barcode.", "error"); return; }
+  const memberId = parseInt(form.scanMember.value);
+  const payload = memberId ? { member_id: memberId } : {};
+  const res = await apiFetch(`/circulation/scan/${encodeURIComponent(barcode)}`, {
+    method: "POST", body: JSON.stringify(payload)
+  });
+  const t = res.transaction;
+  if (res.action === "issued") {
+    showToast(`"${t.book_title}" issued to ${t.member_name}!`);
+  } else {
+    showToast(`"${t.book_title}" returned by ${t.member_name}.`);
+  }
+  form.reset();
   loadBooks();
   loadTransactions();
 }
@@ -285,7 +325,8 @@ document.addEventListener("DOMContentLoaded", () => {
   document.getElementById("add-book-form").addEventListener("submit", addBook);
   document.getElementById("register-member-form").addEventListener("submit", registerMember);
   document.getElementById("issue-book-form").addEventListener("submit", issueBook);
-  document.getElementById("return-book-form").addEventListener("submit", returnBySearch);
+  document.getElementById("scan-form").addEventListener("submit", scanBarcode);
+  document.getElementById("memberSearch").addEventListener("input", onMemberSearch);
   document.getElementById("logout-btn").addEventListener("click", logout);
 
   loadCurrentUser();
@@ -0,0 +1,33 @@
+"""
+tests/conftest.py
+-----------------
+Shared fixtures. Each test gets its own throwaway SQLite database —
+the checked-in library.db is never touched.
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Modules live in the project root (main.py, models.py, routers/ ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base   # noqa: E402
+import models              # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(models.Branch(id=models.DEFAULT_BRANCH_ID, name="Main Branch"))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,178 @@
+"""
+tests/test_branches.py
+----------------------
+Branch partitioning: one branch can't see or touch another's books,
+members, copies or loans; transfers keep both branches' counts in step;
+only an admin manages branches and accounts.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+import models
+import schemas
+from auth import get_current_admin
+from routers.auth import signup
+from routers.books import create_book, get_all_books, get_book_copies, update_book
+from routers.branches import assign_user_to_branch, get_consolidated_catalog, transfer_copy
+from routers.circulation import scan_copy
+from routers.members import get_member, search_members
+from routers.transactions import issue_book, return_book
+
+MAIN = models.DEFAULT_BRANCH_ID
+
+
+@pytest.fixture
+def north(db):
+    branch = models.Branch(name="North")
+    db.add(branch)
+    db.commit()
+    return branch.id
+
+
+@pytest.fixture
+def book(db):
+    return create_book(
+        schemas.BookCreate(title="Dune", author="Herbert", quantity=2),
+        db=db, branch_id=MAIN)
+
+
+@pytest.fixture
+def member(db):
+    member = models.Member(name="Jane Doe", branch_id=MAIN)
+    db.add(member)
+    db.commit()
+    return member
+
+
+def not_found(call):
+    with pytest.raises(HTTPException) as exc:
+        call()
+    return exc.value.status_code == 404
+
+
+def quantities(db, title="Dune"):
+    """{branch_id: (Book.quantity, copies on the shelf)} for one title"""
+    db.expire_all()
+    result = {}
+    for book in db.query(models.Book).filter(models.Book.title == title):
+        on_shelf = db.query(models.Copy).filter(
+            models.Copy.book_id == book.id,
+            models.Copy.branch_id == book.branch_id,
+            models.Copy.status == models.COPY_AVAILABLE).count()
+        result[book.branch_id] = (book.quantity, on_shelf)
+    return result
+
+
+# ── Isolation ────────────────────────────
+
+def test_other_branch_cannot_see_books(db, north, book):
+    assert get_all_books(db=db, branch_id=north) == []
+    assert not_found(lambda: get_book_copies(book.id, db=db, branch_id=north))
+    assert not_found(lambda: update_book(
+        book.id, schemas.BookUpdate(title="Mine now"), db=db, branch_id=north))
+
+
+def test_other_branch_cannot_see_members(db, north, member):
+    assert search_members(q="Jane", fuzzy=False, skip=0, limit=20,
+                          db=db, branch_id=north) == []
+    assert not_found(lambda: get_member(member.id, skip=0, limit=50,
+                                        db=db, branch_id=north))
+
+
+def test_other_branch_cannot_circulate(db, north, book, member):
+    assert not_found(lambda: scan_copy(
+        "000001-0001", schemas.ScanRequest(member_id=member.id), db=db, branch_id=north))
+    assert not_found(lambda: issue_book(
+        schemas.IssueBookRequest(book_id=book.id, member_id=member.id),
+        db=db, branch_id=north))
+
+    loan = issue_book(schemas.IssueBookRequest(book_id=book.id, member_id=member.id),
+                      db=db, branch_id=MAIN)
+    assert not_found(lambda: return_book(loan.id, db=db, branch_id=north))
+    assert quantities(db) == {MAIN: (1, 1)}
+
+
+# ── Transfers ────────────────────────────
+
+def test_transfer_moves_copy_and_counts(db, north, book):
+    moved = transfer_copy(schemas.TransferRequest(barcode="000001-0001", to_branch_id=north),
+                          db=db, branch_id=MAIN)
+    assert moved.branch_id == north
+    assert quantities(db) == {MAIN: (1, 1), north: (1, 1)}
+
+    # a second copy joins the same record at North
+    transfer_copy(schemas.TransferRequest(barcode="000001-0002", to_branch_id=north),
+                  db=db, branch_id=MAIN)
+    assert quantities(db) == {MAIN: (0, 0), north: (2, 2)}
+
+    # North can now lend it out; Main no longer finds it
+    reader = models.Member(name="Ann North", branch_id=north)
+    db.add(reader)
+    db.commit()
+    assert scan_copy("000001-0001", schemas.ScanRequest(member_id=reader.id),
+                     db=db, branch_id=north).action == "issued"
+    assert quantities(db) == {MAIN: (0, 0), north: (1, 1)}
+    assert not_found(lambda: scan_copy(
+        "000001-0001", schemas.ScanRequest(), db=db, branch_id=MAIN))
+
+
+def test_issued_copy_cannot_be_transferred(db, north, book, member):
+    scan_copy("000001-0001", schemas.ScanRequest(member_id=member.id), db=db, branch_id=MAIN)
+    with pytest.raises(HTTPException) as exc:
+        transfer_copy(schemas.TransferRequest(barcode="000001-0001", to_branch_id=north),
+                      db=db, branch_id=MAIN)
+    assert exc.value.status_code == 409
+    assert quantities(db) == {MAIN: (1, 1)}
+
+
+def test_transfer_from_other_branch_is_not_found(db, north, book):
+    assert not_found(lambda: transfer_copy(
+        schemas.TransferRequest(barcode="000001-0001", to_branch_id=MAIN),
+        db=db, branch_id=north))
+
+
+def test_catalog_pages_group_branches(db, north, book):
+    transfer_copy(schemas.TransferRequest(barcode="000001-0001", to_branch_id=north),
+                  db=db, branch_id=MAIN)
+    create_book(schemas.BookCreate(title="Emma", author="Austen", quantity=1),
+                db=db, branch_id=north)
+
+    first = get_consolidated_catalog(skip=0, limit=1, db=db, _user=None)
+    assert [(b.title, b.total_quantity) for b in first] == [("Dune", 2)]
+    assert sorted((s.branch_id, s.quantity) for s in first[0].branches) == \
+        [(MAIN, 1), (north, 1)]
+
+    second = get_consolidated_catalog(skip=1, limit=1, db=db, _user=None)
+    assert [(b.title, b.total_quantity) for b in second] == [("Emma", 1)]
+
+
+# ── Accounts ─────────────────────────────
+
+def signup_user(db, name):
+    signup(schemas.UserSignup(username=name, email=f"{name}@example.com",
+                              password="secret123"), db=db)
+    return db.query(models.User).filter(models.User.username == name).one()
+
+
+def test_signup_lands_in_main_branch_and_first_is_admin(db):
+    first = signup_user(db, "alice")
+    second = signup_user(db, "bob")
+    assert (first.branch_id, first.is_admin) == (MAIN, True)
+    assert (second.branch_id, second.is_admin) == (MAIN, False)
+
+
+def test_only_admin_manages_branches(db, north):
+    admin = signup_user(db, "alice")
+    staff = signup_user(db, "bob")
+
+    with pytest.raises(HTTPException) as exc:
+        get_current_admin(staff)
+    assert exc.value.status_code == 403
+    assert get_current_admin(admin) is admin
+
+    moved = assign_user_to_branch(north, schemas.BranchAssignment(username="bob"),
+                                  db=db, _admin=admin)
+    assert moved.branch_id == north
+    assert not_found(lambda: assign_user_to_branch(
+        999, schemas.BranchAssignment(username="bob"), db=db, _admin=admin))
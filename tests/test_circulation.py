@@ -0,0 +1,130 @@
+"""
+tests/test_circulation.py
+-------------------------
+Barcoded copies: book creation, issue/return by scan and by transaction,
+and the available count staying in step with the copies table.
+"""
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.orm import sessionmaker
+
+import models
+import schemas
+from routers.books import create_book, create_book_copy, update_book
+from routers.circulation import scan_copy
+from routers.transactions import issue_book, issue_copy, return_book
+
+BRANCH = models.DEFAULT_BRANCH_ID
+
+
+@pytest.fixture
+def book(db):
+    return create_book(
+        schemas.BookCreate(title="Dune", author="Herbert", quantity=2),
+        db=db, branch_id=BRANCH)
+
+
+@pytest.fixture
+def member(db):
+    member = models.Member(name="Jane Doe", branch_id=BRANCH)
+    db.add(member)
+    db.commit()
+    return member
+
+
+def scan(db, barcode, member_id=None):
+    return scan_copy(barcode, schemas.ScanRequest(member_id=member_id),
+                     db=db, branch_id=BRANCH)
+
+
+def available(db, book):
+    """(Book.quantity, copies actually on the shelf)"""
+    db.refresh(book)
+    on_shelf = db.query(models.Copy).filter(
+        models.Copy.book_id == book.id,
+        models.Copy.status == models.COPY_AVAILABLE).count()
+    return book.quantity, on_shelf
+
+
+def test_create_book_makes_one_copy_per_unit(db, book):
+    assert sorted(c.barcode for c in book.copies) == ["000001-0001", "000001-0002"]
+    assert available(db, book) == (2, 2)
+
+
+def test_quantity_is_bounded(db):
+    with pytest.raises(ValidationError):
+        schemas.BookCreate(title="T", author="A", quantity=schemas.MAX_COPIES_PER_BOOK + 1)
+    with pytest.raises(ValidationError):
+        schemas.BookCreate(title="T", author="A", quantity=-1)
+
+
+def test_update_cannot_change_quantity(db, book):
+    update_book(book.id, schemas.BookUpdate(title="Dune Messiah", quantity=5),
+                db=db, branch_id=BRANCH)
+    assert available(db, book) == (2, 2)
+
+
+def test_added_copy_skips_hand_entered_barcode(db, book):
+    create_book_copy(book.id, schemas.CopyCreate(barcode="000001-0003"),
+                     db=db, branch_id=BRANCH)
+    generated = create_book_copy(book.id, schemas.CopyCreate(), db=db, branch_id=BRANCH)
+    assert generated.barcode == "000001-0004"
+    assert available(db, book) == (4, 4)
+
+
+def test_scan_issues_then_returns(db, book, member):
+    with pytest.raises(HTTPException) as exc:
+        scan(db, "000001-0001")             # on the shelf, no member given
+    assert exc.value.status_code == 400
+
+    issued = scan(db, "000001-0001", member.id)
+    assert issued.action == "issued"
+    assert issued.transaction.barcode == "000001-0001"
+    assert available(db, book) == (1, 1)
+
+    returned = scan(db, "000001-0001")
+    assert returned.action == "returned"
+    assert returned.transaction.id == issued.transaction.id
+    assert returned.transaction.return_date is not None
+    assert available(db, book) == (2, 2)
+
+
+def test_issue_stops_when_no_copy_is_left(db, book, member):
+    payload = schemas.IssueBookRequest(book_id=book.id, member_id=member.id)
+    barcodes = {issue_book(payload, db=db, branch_id=BRANCH).barcode for _ in range(2)}
+    assert barcodes == {"000001-0001", "000001-0002"}
+
+    with pytest.raises(HTTPException) as exc:
+        issue_book(payload, db=db, branch_id=BRANCH)
+    assert exc.value.status_code == 400
+    assert available(db, book) == (0, 0)
+
+
+def test_return_twice_is_rejected(db, book, member):
+    loan = issue_book(schemas.IssueBookRequest(book_id=book.id, member_id=member.id),
+                      db=db, branch_id=BRANCH)
+    return_book(loan.id, db=db, branch_id=BRANCH)
+    with pytest.raises(HTTPException) as exc:
+        return_book(loan.id, db=db, branch_id=BRANCH)
+    assert exc.value.status_code == 400
+    assert available(db, book) == (2, 2)
+
+
+def test_racing_issue_of_same_copy_gets_409(db, book, member):
+    # Second session read the copy as available before the first one issued it
+    other = sessionmaker(bind=db.get_bind())()
+    stale_copy = other.query(models.Copy).filter(
+        models.Copy.barcode == "000001-0001").one()
+
+    scan(db, "000001-0001", member.id)
+
+    with pytest.raises(HTTPException) as exc:
+        issue_copy(other, stale_copy.book, other.get(models.Member, member.id), stale_copy)
+    assert exc.value.status_code == 409
+    other.rollback()
+    other.close()
+
+    assert db.query(models.Transaction).count() == 1
+    assert available(db, book) == (1, 1)
@@ -0,0 +1,120 @@
+"""
+tests/test_member_search.py
+---------------------------
+GET /members/search and GET /members/{id} — called directly with a test session.
+"""
+
+import datetime
+import itertools
+import string
+
+import pytest
+from fastapi import HTTPException
+
+import models
+from routers.members import FUZZY_CANDIDATES, get_member, search_members
+
+BRANCH = models.DEFAULT_BRANCH_ID
+
+
+def add_members(db, names):
+    """Insert members with their name tokens, as register_member does."""
+    for name in names:
+        member = models.Member(name=name, branch_id=BRANCH)
+        member.name_tokens = [
+            models.MemberNameToken(branch_id=BRANCH, token=token)
+            for token in models.name_tokens(name)
+        ]
+        db.add(member)
+    db.commit()
+
+
+def search(db, q, fuzzy=False):
+    members = search_members(q=q, fuzzy=fuzzy, skip=0, limit=20, db=db, branch_id=BRANCH)
+    return [m.name for m in members]
+
+
+@pytest.fixture
+def crowded(db):
+    """
+    John Smith plus 2000 "Sma... Jones" members — more same-prefix tokens
+    than FUZZY_CANDIDATES, all sorting before "smith".
+    """
+    filler = ["Sma" + "".join(letters) + " Jones"
+              for letters in itertools.product(string.ascii_lowercase, repeat=3)][:2000]
+    assert len(filler) > FUZZY_CANDIDATES
+    add_members(db, filler + ["John Smith"])
+    return db
+
+
+def test_fuzzy_exact_word_not_crowded_out(crowded):
+    assert search(crowded, "smith", fuzzy=True)[0] == "John Smith"
+
+
+def test_fuzzy_typo_finds_nearest_word(crowded):
+    assert search(crowded, "smoth", fuzzy=True)[0] == "John Smith"
+
+
+@pytest.mark.parametrize("typo", ["xmith", "snith", "smiht"])
+def test_fuzzy_typo_anywhere_in_word(crowded, typo):
+    assert search(crowded, typo, fuzzy=True)[0] == "John Smith"
+
+
+@pytest.mark.parametrize("typo", ["dxe", "xoe", "jnae"])
+def test_fuzzy_typo_in_first_letters(db, typo):
+    add_members(db, ["Jane Doe", "Dan Brown", "Joe Black"])
+    assert search(db, typo, fuzzy=True)[0] == "Jane Doe"
+
+
+def test_prefix_is_case_insensitive(db):
+    add_members(db, ["Jane Doe", "jason Bourne", "Mary Jane"])
+    assert search(db, "JA") == ["Jane Doe", "jason Bourne"]
+
+
+def test_prefix_escapes_wildcards(db):
+    add_members(db, ["Mary_Jane", "Maryland Smith"])
+    assert search(db, "Mary_") == ["Mary_Jane"]
+    assert search(db, "%") == []
+
+
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_blank_query_rejected(db, fuzzy):
+    add_members(db, ["Jane Doe"])
+    with pytest.raises(HTTPException) as exc:
+        search(db, "   ", fuzzy=fuzzy)
+    assert exc.value.status_code == 422
+
+
+# ── Member detail ────────────────────────
+
+def test_member_detail_lists_open_loans_first(db):
+    add_members(db, ["Jane Doe"])
+    member = db.query(models.Member).one()
+    book = models.Book(title="Dune", author="Herbert", quantity=0, branch_id=BRANCH)
+    db.add(book)
+    db.flush()
+
+    day = datetime.date(2026, 3, 1)
+    loans = {}
+    for name, issued, returned in [
+        ("old returned", 1, 5), ("old open", 2, None), ("new returned", 8, 9),
+        ("new open", 10, None), ("middle returned", 4, 6),
+    ]:
+        loan = models.Transaction(
+            branch_id=BRANCH, book_id=book.id, member_id=member.id,
+            issue_date=day + datetime.timedelta(days=issued),
+            return_date=returned and day + datetime.timedelta(days=returned))
+        db.add(loan)
+        db.flush()
+        loans[loan.id] = name
+    db.commit()
+
+    def page(skip, limit):
+        detail = get_member(member.id, skip=skip, limit=limit, db=db, branch_id=BRANCH)
+        return ([loans[t.id] for t in detail.current_loans],
+                [loans[t.id] for t in detail.past_loans])
+
+    assert page(0, 50) == (["new open", "old open"],
+                           ["new returned", "middle returned", "old returned"])
+    assert page(0, 3) == (["new open", "old open"], ["new returned"])
+    assert page(3, 3) == ([], ["middle returned", "old returned"])
@@ -0,0 +1,148 @@
+"""
+tests/test_migrations.py
+------------------------
+Upgrading real databases to LATEST_VERSION: the checked-in library.db
+(pre-migrations, user_version 0) and one first booted by the branch-aware
+build that still used create_all, whose copies table has a branch_id
+NOT NULL column with no default.
+"""
+
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from migrations import LATEST_VERSION, get_version, migrate
+from routers.members import search_members
+from routers.transactions import return_book
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = models.DEFAULT_BRANCH_ID
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A scratch copy of the checked-in library.db, with one loan still open."""
+    path = tmp_path / "library.db"
+    shutil.copy(os.path.join(ROOT, "library.db"), path)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        if get_version(conn) != 0:
+            pytest.skip("library.db in the working tree has already been migrated")
+        conn.exec_driver_sql(
+            "INSERT INTO transactions (book_id, member_id, issue_date) "
+            "VALUES (1, 1, '2026-03-01')")
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def upgrade_like_branch_build(engine):
+    """What booting the branch-aware, pre-migrations build did to a database."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("""
+            CREATE TABLE branches (
+                id INTEGER NOT NULL, name VARCHAR(255) NOT NULL,
+                PRIMARY KEY (id), UNIQUE (name))""")
+        conn.exec_driver_sql("""
+            CREATE TABLE copies (
+                id INTEGER NOT NULL, branch_id INTEGER NOT NULL,
+                book_id INTEGER NOT NULL, barcode VARCHAR(64) NOT NULL,
+                status VARCHAR(16) NOT NULL, PRIMARY KEY (id),
+                FOREIGN KEY(branch_id) REFERENCES branches (id),
+                FOREIGN KEY(book_id) REFERENCES books (id))""")
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX ix_copies_barcode ON copies (barcode)")
+        conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN copy_id INTEGER")
+        for table in ("transactions", "books", "members"):
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table} ADD COLUMN branch_id INTEGER NOT NULL DEFAULT {MAIN}")
+        conn.exec_driver_sql("ALTER TABLE users ADD COLUMN branch_id INTEGER")
+        conn.exec_driver_sql("INSERT INTO branches (id, name) VALUES (?, 'Main Branch')", (MAIN,))
+
+        # A second branch and a book added there through the API, with its copy
+        conn.exec_driver_sql("INSERT INTO branches (id, name) VALUES (2, 'North')")
+        book_id = conn.exec_driver_sql(
+            "INSERT INTO books (title, author, quantity, branch_id) "
+            "VALUES ('Emma', 'Austen', 1, 2)").lastrowid
+        conn.exec_driver_sql(
+            "INSERT INTO copies (branch_id, book_id, barcode, status) VALUES (2, ?, ?, ?)",
+            (book_id, models.copy_barcode(book_id, 1), models.COPY_AVAILABLE))
+        # ...and one there from before branches, never given copies
+        conn.exec_driver_sql(
+            "INSERT INTO books (title, author, quantity, branch_id) "
+            "VALUES ('Persuasion', 'Austen', 2, 2)")
+
+
+def check_upgraded(engine):
+    with engine.connect() as conn:
+        assert get_version(conn) == LATEST_VERSION
+
+    db = sessionmaker(bind=engine)()
+    try:
+        for book in db.query(models.Book):
+            on_shelf = [c for c in book.copies if c.status == models.COPY_AVAILABLE]
+            assert len(on_shelf) == book.quantity
+            assert all(c.branch_id == book.branch_id for c in book.copies)
+
+        # The open loan got an issued copy and can be returned by the app
+        loan = db.query(models.Transaction).filter(
+            models.Transaction.return_date == None).one()   # noqa: E711
+        assert loan.copy.status == models.COPY_ISSUED
+        return_book(loan.id, db=db, branch_id=MAIN)
+        assert loan.copy.status == models.COPY_AVAILABLE
+
+        # Existing members are searchable through the backfilled tokens,
+        # including by a word with its first letter mistyped
+        member = db.query(models.Member).first()
+        word = max(models.name_tokens(member.name), key=len)
+        for q in (word, "x" + word[1:]):
+            found = search_members(q=q, fuzzy=True, skip=0, limit=20, db=db, branch_id=MAIN)
+            assert member.id in [m.id for m in found]
+
+        assert db.query(models.User).filter(models.User.is_admin == True).count() == 1  # noqa: E712
+    finally:
+        db.close()
+
+
+def test_migrates_checked_in_database(baseline):
+    assert migrate(baseline) == 0
+    check_upgraded(baseline)
+
+
+def test_migrates_database_booted_by_branch_build(baseline):
+    upgrade_like_branch_build(baseline)
+    assert migrate(baseline) == 0
+    check_upgraded(baseline)
+
+    db = sessionmaker(bind=baseline)()
+    try:
+        persuasion = db.query(models.Book).filter(models.Book.title == "Persuasion").one()
+        assert [c.branch_id for c in persuasion.copies] == [2, 2]
+    finally:
+        db.close()
+
+
+def test_migrate_is_a_no_op_when_current(baseline):
+    migrate(baseline)
+    with baseline.connect() as conn:
+        copies = conn.exec_driver_sql("SELECT COUNT(*) FROM copies").scalar()
+    assert migrate(baseline) == LATEST_VERSION
+    with baseline.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM copies").scalar() == copies
+
+
+def test_fresh_database_is_stamped_latest(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    try:
+        assert migrate(engine) == 0
+        with engine.connect() as conn:
+            assert get_version(conn) == LATEST_VERSION
+            assert conn.exec_driver_sql(
+                "SELECT name FROM branches WHERE id = ?", (MAIN,)).scalar() == "Main Branch"
+    finally:
+        engine.dispose()
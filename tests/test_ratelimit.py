@@ -0,0 +1,141 @@
+"""
+tests/test_ratelimit.py
+-----------------------
+Token buckets (refill, Retry-After), separate per-IP and per-user budgets,
+the LRU bucket cap, and load shedding when too many requests are in flight.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import Request
+from fastapi.responses import Response
+
+import ratelimit
+from auth import create_access_token
+from ratelimit import RateLimitMiddleware, TokenBucket
+
+
+class Clock:
+    """Stands in for time.monotonic so tests control the passage of time."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def make_request(path="/books/", method="GET", host="10.0.0.1", username=None):
+    headers = []
+    if username:
+        token = create_access_token({"sub": username})
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return Request({
+        "type": "http", "method": method, "path": path, "query_string": b"",
+        "headers": headers, "client": (host, 5000),
+    })
+
+
+async def ok(_request):
+    return Response("ok")
+
+
+def send(middleware, **kwargs):
+    return asyncio.run(middleware.dispatch(make_request(**kwargs), ok))
+
+
+# ── TokenBucket ──────────────────────────
+
+def test_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(capacity=2, rate=0.5)
+    for _ in range(2):
+        assert bucket.wait_time() is None
+        bucket.take()
+
+    assert bucket.wait_time() == 2         # one token every 2 s
+    clock.now += 1
+    assert bucket.wait_time() == 1
+    clock.now += 1
+    assert bucket.wait_time() is None
+
+
+def test_bucket_never_exceeds_capacity(clock):
+    bucket = TokenBucket(capacity=3, rate=1.0)
+    clock.now += 3600
+    for _ in range(3):
+        assert bucket.wait_time() is None
+        bucket.take()
+    assert bucket.wait_time() == 1
+
+
+# ── Middleware ───────────────────────────
+
+def test_empty_bucket_answers_429_with_retry_after(clock):
+    middleware = RateLimitMiddleware(None)
+    capacity, rate = ratelimit.BUDGETS["login"]
+    for _ in range(int(capacity)):
+        assert send(middleware, path="/auth/login", method="POST", username="alice").status_code == 200
+
+    response = send(middleware, path="/auth/login", method="POST", username="alice")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(round(1 / rate))
+
+
+def test_staff_behind_one_ip_have_their_own_budgets(clock):
+    middleware = RateLimitMiddleware(None)
+    capacity, _ = ratelimit.BUDGETS["list"]
+    for _ in range(int(capacity)):
+        assert send(middleware, username="alice").status_code == 200
+
+    assert send(middleware, username="alice").status_code == 429
+    # Same address, different librarian — the IP budget still has room
+    assert send(middleware, username="bob").status_code == 200
+
+
+def test_rejected_request_spends_no_tokens(clock):
+    middleware = RateLimitMiddleware(None)
+    capacity, _ = ratelimit.BUDGETS["list"]
+    for _ in range(int(capacity) + 5):
+        send(middleware, username="alice")
+
+    ip_bucket = middleware.buckets[("list", "ip:10.0.0.1")]
+    assert ip_bucket.tokens == ratelimit.IP_BUDGETS["list"][0] - capacity
+
+
+def test_bucket_table_is_capped_lru(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_BUCKETS", 3)
+    middleware = RateLimitMiddleware(None)
+    for host in ("a", "b", "c"):
+        send(middleware, host=host)
+    send(middleware, host="a")             # a is now the most recent
+    send(middleware, host="d")             # evicts b
+
+    assert [key for _, key in middleware.buckets] == ["ip:c", "ip:a", "ip:d"]
+
+
+def test_too_many_in_flight_is_shed(clock):
+    middleware = RateLimitMiddleware(None, max_in_flight=2)
+    middleware.in_flight = 2
+
+    response = send(middleware)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(ratelimit.SHED_RETRY_AFTER)
+    assert middleware.buckets == {}        # shed before any bucket is charged
+
+    middleware.in_flight = 1
+    assert send(middleware).status_code == 200
+    assert middleware.in_flight == 1       # released once the response is back
+
+
+def test_pages_and_static_files_are_exempt(clock):
+    middleware = RateLimitMiddleware(None, max_in_flight=0)
+    assert send(middleware, path="/").status_code == 200
+    assert send(middleware, path="/static/script.js").status_code == 200